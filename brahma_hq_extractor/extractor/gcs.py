@@ -1,12 +1,42 @@
+from concurrent.futures import ThreadPoolExecutor
 from google.cloud import storage
+from google.cloud.storage.retry import DEFAULT_RETRY
+from requests.adapters import HTTPAdapter
 
 client = storage.Client()
+# Byte-range reads of one PDF (range_pool below) overlap with the metadata
+# read in main.py; the default 10-connection pool would make them queue.
+client._http.mount("https://", HTTPAdapter(pool_connections=64, pool_maxsize=64))
 
-def read_blob(bucket, path):
-    return client.bucket(bucket).blob(path).download_as_bytes()
+# Objects above this size are downloaded as parallel byte ranges.
+CHUNK_SIZE = 8 * 1024 * 1024
+range_pool = ThreadPoolExecutor(max_workers=8)
 
-def write_blob(bucket, path, data):
-    client.bucket(bucket).blob(path).upload_from_string(
+def read_blob(bucket, path, size=None, generation=None):
+    """Download an object.
+
+    `size` / `generation` come from the Eventarc payload when available: the
+    size avoids a metadata round-trip, the generation pins every range to the
+    same object version.
+    """
+    if size is None or size <= CHUNK_SIZE:
+        return client.bucket(bucket).blob(path, generation=generation).download_as_bytes()
+
+    def read_range(start):
+        blob = client.bucket(bucket).blob(path, generation=generation)
+        return blob.download_as_bytes(start=start, end=min(start + CHUNK_SIZE, size) - 1)
+
+    return b"".join(range_pool.map(read_range, range(0, size, CHUNK_SIZE)))
+
+def write_blob(bucket, path, data, content_type="application/json", metadata=None):
+    # Outputs are derived from the source PDF, so overwriting on a retry is
+    # safe and the upload can use the default retry policy (without a
+    # generation precondition the library would not retry it at all).
+    blob = client.bucket(bucket).blob(path)
+    if metadata:
+        blob.metadata = metadata
+    blob.upload_from_string(
         data,
-        content_type="application/json"
+        content_type=content_type,
+        retry=DEFAULT_RETRY,
     )
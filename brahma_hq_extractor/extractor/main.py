@@ -1,47 +1,80 @@
-import os, json
-from fastapi import FastAPI, Request
-from google.cloud import storage
+import os, json, gzip
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import orjson
+from fastapi import BackgroundTasks, FastAPI, HTTPException, Request
+from google.api_core.exceptions import NotFound
+from extractor.gcs import read_blob, write_blob
 from extractor.pdf_parser import extract_parameters
 
 app = FastAPI(title="Brahma HQ Extractor (Phase D)")
-client = storage.Client()
+# Shared across requests; GCS downloads are latency-bound, so fetch in parallel.
+io_pool = ThreadPoolExecutor(max_workers=8)
 
 BUCKET_ENV = os.getenv("GCS_BUCKET", "brahma-hq-prod")
 
-def read_bytes(bucket: str, path: str) -> bytes:
-    return client.bucket(bucket).blob(path).download_as_bytes()
-
-def write_json(bucket: str, path: str, obj: dict):
-    client.bucket(bucket).blob(path).upload_from_string(
-        json.dumps(obj, indent=2),
-        content_type="application/json"
-    )
+def write_json(bucket: str, path: str, obj: dict, metadata: dict = None):
+    write_blob(bucket, path, orjson.dumps(obj, option=orjson.OPT_INDENT_2), metadata=metadata)
 
 @app.get("/")
 def health():
     return {"status": "extractor alive"}
 
+def is_source_pdf(name: str) -> bool:
+    # Only PDFs in correct prefix
+    return bool(name) and name.startswith("01_Raw_Catalogues/modules/") and name.endswith(".pdf")
+
+def metadata_name(name: str) -> str:
+    return name[:-len(".pdf")] + "_metadata.json"
+
+def read_metadata(bucket: str, name: str) -> dict:
+    return json.loads(read_blob(bucket, metadata_name(name)).decode("utf-8"))
+
 @app.post("/")
-async def eventarc_receiver(req: Request):
+async def eventarc_receiver(req: Request, bg: BackgroundTasks):
     body = await req.json()
+    name = body.get("name")
+    if not is_source_pdf(name):
+        return handle_event(body)
 
+    # The PDF finalize event usually arrives before the uploader has written
+    # <name>_metadata.json. Read it before acking: a 503 makes Eventarc
+    # redeliver the event until it is there.
+    bucket = body.get("bucket") or BUCKET_ENV
+    try:
+        meta = await asyncio.to_thread(read_metadata, bucket, name)
+    except NotFound:
+        raise HTTPException(status_code=503, detail=f"metadata not yet written for {name}")
+
+    # Ack; download/parse/upload runs on a worker thread after the response
+    # is sent, so slow PDFs don't hold the Eventarc connection open.
+    bg.add_task(handle_event, body, meta)
+    return {"status": "accepted", "name": name}
+
+def handle_event(body: dict, meta: dict = None):
     bucket = body.get("bucket") or BUCKET_ENV
     name = body.get("name")
 
     if not name:
         return {"status": "ignored", "reason": "no object name"}
 
-    # Only PDFs in correct prefix
-    if not (name.startswith("01_Raw_Catalogues/modules/") and name.endswith(".pdf")):
+    if not is_source_pdf(name):
         return {"status": "ignored", "name": name}
 
-    meta_name = name.replace(".pdf", "_metadata.json")
+    meta_name = metadata_name(name)
+
+    # Eventarc sends size/generation as strings
+    size = int(body["size"]) if body.get("size") else None
+    generation = int(body["generation"]) if body.get("generation") else None
 
-    # Read metadata and PDF
-    meta = json.loads(read_bytes(bucket, meta_name).decode("utf-8"))
-    pdf_bytes = read_bytes(bucket, name)
+    # Read metadata (unless the receiver already has it) and PDF concurrently
+    pdf_future = io_pool.submit(read_blob, bucket, name, size, generation)
+    if meta is None:
+        meta = read_metadata(bucket, name)
+    pdf_bytes = pdf_future.result()
 
     extracted = extract_parameters(pdf_bytes)
+    raw_tables = extracted.pop("raw_tables")
 
     # IMPORTANT:
     #  - Keep keys even if value is empty-string (""), because Publisher will
@@ -60,6 +93,18 @@ async def eventarc_receiver(req: Request):
         name.replace("01_Raw_Catalogues", "02_Candidates")
             .replace(".pdf", ".json")
     )
+    # Raw tables largely duplicate raw_text; keep them out of the candidate
+    # and store them compressed next to it, fetched only on demand.
+    tables_name = out_name[:-len(".json")] + "_raw_tables.json.gz"
+    candidate["raw_tables_path"] = f"gs://{bucket}/{tables_name}"
 
-    write_json(bucket, out_name, candidate)
+    # Review flags as object metadata, so the reviewer's pending list can be
+    # filtered from the listing without downloading each candidate.
+    flags = {
+        "needs_review": "true" if candidate.get("needs_review", True) is True else "false",
+        "status": str(candidate.get("status") or ""),
+    }
+    # Sidecar first: the candidate must never point at a missing object.
+    write_blob(bucket, tables_name, gzip.compress(orjson.dumps(raw_tables)), content_type="application/gzip")
+    write_json(bucket, out_name, candidate, metadata=flags)
     return {"status": "ok", "written": out_name}
@@ -16,25 +16,118 @@ This module intentionally returns MOST values as strings. This ensures:
 
 from __future__ import annotations
 
-import json
 import re
+import string
 from dataclasses import dataclass
-from io import BytesIO
-from typing import Dict, List, Tuple
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+import pymupdf
+
+# Patterns used on every line / table cell are compiled once at import.
+_WS_RE = re.compile(r"\s+")
+_UNDERSCORES_RE = re.compile(r"_+")
+_NUM_RE = re.compile(r"\d+\.\d+|\d+")
+_DECIMAL_RE = re.compile(r"\d+\.\d+")
+_POWER_CLASS_RE = re.compile(r"\b(\d{3})\b")
+_LEADING_WORD_RE = re.compile(r"[A-Za-z0-9]+")
+# Pmax Vmp Imp Voc Isc Eff; the digit classes pre-filter the plausible STC
+# ranges (Pmax 500-800, Vmp 20-80, Voc 30-90, Eff 10-30) so junk rows never
+# reach the Python-side float() checks.
+_RENEWSYS_ROW_RE = re.compile(
+    r"(?<![\d.])([5-7]\d\d|800)\s+([2-7]\d\.\d+|80\.\d+)\s+(\d+\.\d+)"
+    r"\s+([3-8]\d\.\d+|90\.\d+)\s+(\d+\.\d+)\s+([12]\d\.\d+|30\.\d+)"
+)
+
+# Canonical fields (top-level) using robust patterns, compiled once at import.
+# These become "expected" columns, but Publisher will still be dynamic.
+# Patterns per field are tried in order; the first hit wins.
+CANONICAL_PATTERNS: List[Tuple[str, List[re.Pattern]]] = [
+    ("power_tolerance", [re.compile(r"Power\s+Tolerance\s*[:\-]?\s*([^\n]+)", re.I)]),
+    ("temperature_noct", [
+        re.compile(r"45\s*±\s*2\s*°C", re.I),
+        re.compile(r"NOCT[^\n]*?([0-9]+\s*±\s*[0-9]+\s*°C)", re.I),
+    ]),
+    ("maximum_system_voltage", [re.compile(r"Maximum\s+System\s+Voltage\s*[:\-]?\s*([^\n]+)", re.I)]),
+    ("maximum_series_fuse_rating", [re.compile(r"Maximum\s+Series\s+Fuse\s+Rating\s*[:\-]?\s*([^\n]+)", re.I)]),
+    ("refer_bifacial_factor", [re.compile(r"Refer\.?\s*Bifacial\s*Factor\s*[:\-]?\s*([^\n]+)", re.I)]),
+    ("temperature_coefficient_pmax", [
+        re.compile(r"Temperature\s+Coefficient\s+of\s+Pmax\s*[:\-]?\s*([^\n]+)", re.I),
+        re.compile(r"TEMPERATURE\s*COEFFICIENT\s*[:\-]?\s*([^\n]+)", re.I),
+    ]),
+    ("temperature_coefficient_voc", [re.compile(r"Temperature\s+Coefficient\s+of\s+Voc\s*[:\-]?\s*([^\n]+)", re.I)]),
+    ("temperature_coefficient_isc", [re.compile(r"Temperature\s+Coefficient\s+of\s+Isc\s*[:\-]?\s*([^\n]+)", re.I)]),
+    # Mechanical / packaging (common on many datasheets)
+    ("dimensions", [re.compile(r"Dimensions\s*[:\-]?\s*([^\n]+)", re.I)]),
+    ("weight", [re.compile(r"Weight\s*[:\-]?\s*([^\n]+)", re.I)]),
+    ("front_glass", [re.compile(r"Front\s+Glass\s*[:\-]?\s*([^\n]+)", re.I)]),
+    ("back_glass", [re.compile(r"Back\s+Glass\s*[:\-]?\s*([^\n]+)", re.I)]),
+    ("frame", [re.compile(r"Frame\s*[:\-]?\s*([^\n]+)", re.I)]),
+    ("junction_box", [re.compile(r"Junction\s+Box\s*[:\-]?\s*([^\n]+)", re.I)]),
+    ("protection_class", [re.compile(r"Protection\s+Class\s*[:\-]?\s*([^\n]+)", re.I)]),
+    ("iec_fire_type", [re.compile(r"IEC\s*Fire\s*Type\s*[:\-]?\s*([^\n]+)", re.I)]),
+    ("output_cables", [re.compile(r"Output\s+Cables\s*[:\-]?\s*([^\n]+)", re.I)]),
+    ("pallet_dimensions", [re.compile(r"Pallet\s+Dimen(?:tions|sions)\s*[:\-]?\s*([^\n]+)", re.I)]),
+    ("packing_details", [re.compile(r"(\d+\s*pcs/pallet[^\n]*)", re.I)]),
+]
+
+# Fields practically every module datasheet states on its spec pages. Once
+# these and a variant table have been seen, table detection stops (see
+# extract_parameters); rarer fields like back_glass would keep it going.
+_CORE_PATTERNS: Dict[str, List[re.Pattern]] = {
+    key: patterns for key, patterns in CANONICAL_PATTERNS
+    if key in {
+        "maximum_system_voltage", "maximum_series_fuse_rating",
+        "temperature_coefficient_pmax", "temperature_coefficient_voc",
+        "temperature_coefficient_isc", "dimensions", "weight", "frame",
+        "junction_box",
+    }
+}
+
+
+def _anchor(pattern: re.Pattern) -> str:
+    """Lowercased literal word every match of `pattern` starts with ("" if none)."""
+    m = _LEADING_WORD_RE.match(pattern.pattern)
+    if not m:
+        return ""
+    word = m.group(0)
+    if pattern.pattern[m.end():m.end() + 1] in ("?", "*", "+", "{"):
+        word = word[:-1]  # quantifier applies to the last char
+    return word.lower()
+
 
-import pdfplumber
+# A match can only start where its anchor occurs, so str.find() on the
+# lowercased text (a C-level substring search) jumps straight to the first
+# candidate position, and rules the field out when the label is absent.
+_ANCHORS: Dict[re.Pattern, str] = {p: _anchor(p) for _, pats in CANONICAL_PATTERNS for p in pats}
 
 
 def _norm_ws(s: str) -> str:
-    return re.sub(r"\s+", " ", (s or "")).strip()
+    return _WS_RE.sub(" ", (s or "")).strip()
+
+
+class _KeyCharMap(dict):
+    """str.translate table for _norm_key: [a-z0-9] kept, % and ° spelled
+    out, every other code point (filled in on first sight) becomes "_"."""
 
+    def __missing__(self, code: int) -> str:
+        self[code] = "_"
+        return "_"
 
+
+_KEY_CHARS = _KeyCharMap({ord(c): c for c in string.ascii_lowercase + string.digits})
+_KEY_CHARS[ord("%")] = "_pct_"
+_KEY_CHARS[ord("°")] = "_deg_"
+
+
+@lru_cache(maxsize=4096)
 def _norm_key(label: str) -> str:
-    """Convert any label into a safe sqlite column name."""
-    s = (label or "").strip().lower()
-    s = s.replace("%", " pct ").replace("°", " deg ")
-    s = re.sub(r"[^a-z0-9]+", "_", s)
-    s = re.sub(r"_+", "_", s).strip("_")
+    """Convert any label into a safe sqlite column name.
+
+    Cached: vendors reuse the same label vocabulary across datasheets.
+    """
+    s = (label or "").strip().lower().translate(_KEY_CHARS)
+    s = _UNDERSCORES_RE.sub("_", s).strip("_")
     if not s:
         return "unnamed"
     # sqlite keyword safety (minimal)
@@ -43,9 +136,15 @@ def _norm_key(label: str) -> str:
     return s
 
 
-def _first_match(text: str, patterns: List[str]) -> str:
+def _first_match(text: str, patterns: List[re.Pattern], lowered: Optional[str] = None) -> str:
     for pat in patterns:
-        m = re.search(pat, text, flags=re.IGNORECASE)
+        pos = 0
+        anchor = _ANCHORS.get(pat, "") if lowered is not None else ""
+        if anchor:
+            pos = lowered.find(anchor)
+            if pos < 0:
+                continue
+        m = pat.search(text, pos)
         if m:
             # Some patterns intentionally match without a capturing group.
             # If there is no group(1), fall back to the entire match.
@@ -54,6 +153,39 @@ def _first_match(text: str, patterns: List[str]) -> str:
     return ""
 
 
+def _page_text(page, y_tolerance: float = 3.0) -> str:
+    """Rebuild visual lines from PyMuPDF word boxes.
+
+PyMuPDF's plain get_text() emits every text block on its own line (a
+label and its value end up on separate lines). The heuristics below are
+line based, so group words whose tops are within `y_tolerance` points
+into one line, left to right (same default tolerance as pdfplumber).
+"""
+    words = page.get_text("words")
+    if not words:
+        return ""
+    words.sort(key=lambda w: (w[1], w[0]))
+    lines: List[List[tuple]] = []
+    top = None
+    for w in words:
+        if top is None or w[1] - top > y_tolerance:
+            lines.append([])
+            top = w[1]
+        lines[-1].append(w)
+    return "\n".join(" ".join(w[4] for w in sorted(line, key=lambda w: w[0])) for line in lines)
+
+
+def _split_double_space(s: str):
+    """Split "label  value" at the first run of 2+ spaces (no regex)."""
+    i = s.find("  ")
+    if i < 0:
+        return None
+    j = i + 2
+    while j < len(s) and s[j] == " ":
+        j += 1
+    return s[:i], s[j:]
+
+
 def _extract_kv_from_lines(text: str) -> Dict[str, str]:
     """Heuristic key/value extraction from plain text lines.
 
@@ -63,17 +195,20 @@ Works well for lines like:
 """
     out: Dict[str, str] = {}
     for line in (text or "").splitlines():
+        # cheap reject before normalizing: no separator, nothing to split
+        if ":" not in line and "  " not in line:
+            continue
         l = _norm_ws(line)
-        if not l or len(l) < 6:
+        if len(l) < 6:
             continue
 
         # common separators
         if ":" in l:
-            left, right = l.split(":", 1)
-        elif "  " in l:
-            # split on 2+ spaces (label  value)
-            parts = re.split(r"\s{2,}", l, maxsplit=1)
-            if len(parts) != 2:
+            left, _, right = l.partition(":")
+        elif "  " in line:
+            # split on 2+ spaces (label  value); the raw line still has them
+            parts = _split_double_space(line.strip())
+            if parts is None:
                 continue
             left, right = parts
         else:
@@ -113,10 +248,21 @@ def _extract_kv_from_tables(tables: List[List[List[str]]]) -> Dict[str, str]:
 
 
 def _parse_row_numbers(line: str, expected: int = 5) -> List[str]:
-    nums = re.findall(r"\d+\.\d+|\d+", line or "")
+    nums = _NUM_RE.findall(line or "")
     return nums[-expected:] if len(nums) >= expected else []
 
 
+# Lowercased row label -> metric, for datasheets with one line per STC metric.
+_JINKO_ROW_LABELS = {
+    "maximum power - pmax": "pmax",
+    "maximum power voltage - vmp": "vmp",
+    "maximum power current - imp": "imp",
+    "open-circuit voltage - voc": "voc",
+    "short-circuit current - isc": "isc",
+    "module efficiency stc": "eff",
+}
+
+
 def _parse_jinko_like_variants(text: str) -> List[Dict[str, str]]:
     """Parse datasheets that show STC values in a single line per metric.
 
@@ -126,23 +272,25 @@ Example:
 """
     lines = [_norm_ws(l) for l in (text or "").splitlines() if _norm_ws(l)]
 
-    def find_line(prefix: str) -> str:
-        for l in lines:
-            if prefix.lower() in l.lower():
-                return l
-        return ""
+    # first line containing each label; one pass, each line lowercased once
+    found: Dict[str, str] = {}
+    for l in lines:
+        ll = l.lower()
+        for label, key in _JINKO_ROW_LABELS.items():
+            if key not in found and label in ll:
+                found[key] = l
+        if len(found) == len(_JINKO_ROW_LABELS):
+            break
 
-    pmax = _parse_row_numbers(find_line("Maximum Power - Pmax"), 5)
+    pmax = _parse_row_numbers(found.get("pmax", ""), 5)
     if not pmax:
         return []
 
-    vmp = _parse_row_numbers(find_line("Maximum Power Voltage - Vmp"), 5)
-    imp = _parse_row_numbers(find_line("Maximum Power Current - Imp"), 5)
-    voc = _parse_row_numbers(find_line("Open-circuit Voltage - Voc"), 5)
-    isc = _parse_row_numbers(find_line("Short-circuit Current - Isc"), 5)
-
-    eff_line = find_line("Module Efficiency STC")
-    eff = _parse_row_numbers(eff_line, 5)
+    vmp = _parse_row_numbers(found.get("vmp", ""), 5)
+    imp = _parse_row_numbers(found.get("imp", ""), 5)
+    voc = _parse_row_numbers(found.get("voc", ""), 5)
+    isc = _parse_row_numbers(found.get("isc", ""), 5)
+    eff = _parse_row_numbers(found.get("eff", ""), 5)
 
     # NOCT block often appears as:
     # Specifications (NOCT)
@@ -186,19 +334,12 @@ def _parse_renewsys_like_variants(text: str) -> List[Dict[str, str]]:
     """Parse datasheets that list STC variants as repeating blocks:
     e.g. "600 39.38 15.25 46.95 15.99 22.24".
     """
-    # Pmax Vmp Imp Voc Isc Eff
-    pat = re.compile(r"(?<!\d)(\d{3})\s+(\d+\.\d+)\s+(\d+\.\d+)\s+(\d+\.\d+)\s+(\d+\.\d+)\s+(\d+\.\d+)")
     rows: Dict[str, Tuple[str, str, str, str, str]] = {}
-    for p, vmp, imp, voc, isc, eff in pat.findall(text or ""):
-        # filter out obvious non-STC numeric junk
-        try:
-            p_i = int(p)
-            vmp_f = float(vmp)
-            voc_f = float(voc)
-            eff_f = float(eff)
-        except Exception:
-            continue
-        if not (500 <= p_i <= 800 and 20 <= vmp_f <= 80 and 30 <= voc_f <= 90 and 10 <= eff_f <= 30):
+    for m in _RENEWSYS_ROW_RE.finditer(text or ""):
+        p, vmp, imp, voc, isc, eff = m.groups()
+        # the pattern already bounds the ranges; this only settles the upper
+        # edges it lets through (e.g. "80.5" for Vmp)
+        if not (float(vmp) <= 80 and float(voc) <= 90 and float(eff) <= 30):
             continue
         rows[p] = (vmp, imp, voc, isc, eff)
 
@@ -216,12 +357,12 @@ def _parse_renewsys_like_variants(text: str) -> List[Dict[str, str]]:
     lines = [_norm_ws(l) for l in (text or "").splitlines() if _norm_ws(l)]
     for i, l in enumerate(lines):
         if "noct" in l.lower() and "@800" in l.lower():
-            powers = re.findall(r"\b(\d{3})\b", l)
+            powers = _POWER_CLASS_RE.findall(l)
             # next 3 lines typically: noct_pmax, noct_vmp, noct_imp
             if i + 3 < len(lines):
-                pmax_noct = re.findall(r"\d+\.\d+", lines[i + 1])
-                vmp_noct = re.findall(r"\d+\.\d+", lines[i + 2])
-                imp_noct = re.findall(r"\d+\.\d+", lines[i + 3])
+                pmax_noct = _DECIMAL_RE.findall(lines[i + 1])
+                vmp_noct = _DECIMAL_RE.findall(lines[i + 2])
+                imp_noct = _DECIMAL_RE.findall(lines[i + 3])
                 for j, pwr in enumerate(powers[: len(pmax_noct)]):
                     noct_map[pwr] = {
                         "noct_pmax_w": pmax_noct[j] if j < len(pmax_noct) else "",
@@ -252,6 +393,15 @@ def _parse_renewsys_like_variants(text: str) -> List[Dict[str, str]]:
     return variants
 
 
+def _extract_canonical(text: str) -> Dict[str, str]:
+    """Canonical fields; every key is always present, missing values are ""."""
+    lowered = text.lower()
+    if len(lowered) != len(text):
+        # some chars change length when lowercased; offsets would not line up
+        lowered = None
+    return {key: _first_match(text, patterns, lowered) for key, patterns in CANONICAL_PATTERNS}
+
+
 def extract_parameters(pdf_bytes: bytes) -> Dict[str, object]:
     """Return a FLAT dict of extracted fields + variants.
 
@@ -259,55 +409,50 @@ def extract_parameters(pdf_bytes: bytes) -> Dict[str, object]:
       - many top-level keys that are safe sqlite column names
       - "variants": list[dict] (each dict is also flat)
       - "raw_text": full extracted text (never empty unless PDF is unreadable)
+      - "raw_tables": list of extracted tables (not part of the candidate
+        payload; the caller stores it as a separate object)
       - "extraction_method": string
     """
-    all_text = ""
+    parts: List[str] = []
     all_tables: List[List[List[str]]] = []
-    with pdfplumber.open(BytesIO(pdf_bytes)) as pdf:
-        for page in pdf.pages:
-            all_text += (page.extract_text() or "") + "\n"
+    missing_core = set(_CORE_PATTERNS)
+    has_variants = False
+    tables_done = False
+    with pymupdf.open(stream=pdf_bytes, filetype="pdf") as doc:
+        for page in doc:
+            page_text = _page_text(page)
+            parts.append(page_text)
+            if tables_done:
+                continue
             try:
-                all_tables.extend(page.extract_tables() or [])
+                all_tables.extend(t.extract() for t in page.find_tables().tables)
             except Exception:
                 # table extraction can fail for some PDFs; keep going
                 pass
 
-    text = _norm_ws(all_text)
+            # Electrical/mechanical specs sit on the first pages. Once the core
+            # canonical fields and a variant table have been seen, skip table
+            # detection (the costly part) on the remaining pages; their text
+            # is still read so raw_text stays complete. Both checks look at
+            # this page only and remember what they found, so the loop stays
+            # linear in the page count.
+            if missing_core:
+                lowered = page_text.lower()
+                if len(lowered) != len(page_text):
+                    lowered = None
+                missing_core = {k for k in missing_core if not _first_match(page_text, _CORE_PATTERNS[k], lowered)}
+            if not has_variants:
+                has_variants = bool(_parse_jinko_like_variants(page_text) or _parse_renewsys_like_variants(page_text))
+            tables_done = not missing_core and has_variants
+
+    all_text = "\n".join(parts)
 
     # Start with generic key/value extraction
     kv = {}
     kv.update(_extract_kv_from_tables(all_tables))
     kv.update(_extract_kv_from_lines(all_text))
 
-    # Canonical fields (top-level) using robust patterns.
-    # These become "expected" columns, but Publisher will still be dynamic.
-    canonical: Dict[str, str] = {
-        "power_tolerance": _first_match(all_text, [r"Power\s+Tolerance\s*[:\-]?\s*([^\n]+)"]),
-        "temperature_noct": _first_match(all_text, [r"45\s*±\s*2\s*°C", r"NOCT[^\n]*?([0-9]+\s*±\s*[0-9]+\s*°C)"]),
-        "maximum_system_voltage": _first_match(all_text, [r"Maximum\s+System\s+Voltage\s*[:\-]?\s*([^\n]+)"]),
-        "maximum_series_fuse_rating": _first_match(all_text, [r"Maximum\s+Series\s+Fuse\s+Rating\s*[:\-]?\s*([^\n]+)"]),
-        "refer_bifacial_factor": _first_match(all_text, [r"Refer\.?\s*Bifacial\s*Factor\s*[:\-]?\s*([^\n]+)"]),
-        "temperature_coefficient_pmax": _first_match(all_text, [r"Temperature\s+Coefficient\s+of\s+Pmax\s*[:\-]?\s*([^\n]+)", r"TEMPERATURE\s*COEFFICIENT\s*[:\-]?\s*([^\n]+)"]),
-        "temperature_coefficient_voc": _first_match(all_text, [r"Temperature\s+Coefficient\s+of\s+Voc\s*[:\-]?\s*([^\n]+)"]),
-        "temperature_coefficient_isc": _first_match(all_text, [r"Temperature\s+Coefficient\s+of\s+Isc\s*[:\-]?\s*([^\n]+)"]),
-    }
-
-    # Mechanical / packaging (common on many datasheets)
-    canonical.update(
-        {
-            "dimensions": _first_match(all_text, [r"Dimensions\s*[:\-]?\s*([^\n]+)"]),
-            "weight": _first_match(all_text, [r"Weight\s*[:\-]?\s*([^\n]+)"]),
-            "front_glass": _first_match(all_text, [r"Front\s+Glass\s*[:\-]?\s*([^\n]+)"]),
-            "back_glass": _first_match(all_text, [r"Back\s+Glass\s*[:\-]?\s*([^\n]+)"]),
-            "frame": _first_match(all_text, [r"Frame\s*[:\-]?\s*([^\n]+)"]),
-            "junction_box": _first_match(all_text, [r"Junction\s+Box\s*[:\-]?\s*([^\n]+)"]),
-            "protection_class": _first_match(all_text, [r"Protection\s+Class\s*[:\-]?\s*([^\n]+)"]),
-            "iec_fire_type": _first_match(all_text, [r"IEC\s*Fire\s*Type\s*[:\-]?\s*([^\n]+)"]),
-            "output_cables": _first_match(all_text, [r"Output\s+Cables\s*[:\-]?\s*([^\n]+)"]),
-            "pallet_dimensions": _first_match(all_text, [r"Pallet\s+Dimen(?:tions|sions)\s*[:\-]?\s*([^\n]+)"]),
-            "packing_details": _first_match(all_text, [r"(\d+\s*pcs/pallet[^\n]*)"]),
-        }
-    )
+    canonical = _extract_canonical(all_text)
 
     # Merge: canonical overrides generic kv when it has a value
     out: Dict[str, object] = {}
@@ -326,10 +471,11 @@ def extract_parameters(pdf_bytes: bytes) -> Dict[str, object]:
         variants = _parse_renewsys_like_variants(all_text)
     out["variants"] = variants
 
-    # Always store raw text and raw tables (as JSON) so values are never lost.
+    # Always store raw text and raw tables so values are never lost.
+    # (raw tables cover the pages that were scanned for tables, see above)
     out["raw_text"] = all_text or ""
-    out["raw_tables_json"] = json.dumps(all_tables, ensure_ascii=False)
-    out["extraction_method"] = "pdfplumber_generic_kv+variants_v1"
+    out["raw_tables"] = all_tables
+    out["extraction_method"] = "pymupdf_generic_kv+variants_v1"
 
     # Ensure no None values (Publisher expects this too)
     for k, v in list(out.items()):
@@ -0,0 +1,13 @@
+from extractor.pdf_parser import _parse_renewsys_like_variants
+
+
+def test_renewsys_row():
+    variants = _parse_renewsys_like_variants("600 39.38 15.25 46.95 15.99 22.24")
+    assert [v["pmax_w"] for v in variants] == ["600"]
+    assert variants[0]["efficiency_pct"] == "22.24"
+
+
+def test_renewsys_pmax_not_taken_from_decimal_part():
+    # "5.591" must not yield a 591 W row
+    text = "46.35 697 660 825 641 5.591 24.666 86.5 63.174 19.9 12.78"
+    assert _parse_renewsys_like_variants(text) == []
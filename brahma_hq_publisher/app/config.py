@@ -12,7 +12,7 @@ RELEASE_ROOT = os.getenv("RELEASE_ROOT", "04_Releases")
 ACTIVE_OBJECT = os.getenv("ACTIVE_OBJECT", f"{RELEASE_ROOT}/ACTIVE")
 
 # Release metadata
-SCHEMA_VERSION = os.getenv("SCHEMA_VERSION", "1.0.0")
+SCHEMA_VERSION = os.getenv("SCHEMA_VERSION", "2.0.0")
 PRODUCT_DB_NAME = os.getenv("PRODUCT_DB_NAME", "brahma_products.sqlite")
 
 # Signing (optional; if you want signed URLs from this service)
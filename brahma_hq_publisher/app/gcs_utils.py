@@ -1,12 +1,21 @@
 from google.cloud import storage
-from typing import Iterable, List, Optional
-import json
+from requests.adapters import HTTPAdapter
+from typing import Iterable, Iterator, List, Optional
+import orjson
 
 client = storage.Client()
+# publisher.py loads master JSON and copies standards on 32 threads; give the
+# session enough pooled connections that none of them reconnects.
+client._http.mount("https://", HTTPAdapter(pool_connections=64, pool_maxsize=64))
 
-def list_objects(bucket: str, prefix: str) -> List[str]:
+def iter_objects(bucket: str, prefix: str) -> Iterator[str]:
     b = client.bucket(bucket)
-    return [blob.name for blob in client.list_blobs(b, prefix=prefix)]
+    # Only names are used: ask GCS for just that field, 1000 per page (the max).
+    blobs = client.list_blobs(b, prefix=prefix, fields="items(name),nextPageToken", page_size=1000)
+    return (blob.name for blob in blobs)
+
+def list_objects(bucket: str, prefix: str) -> List[str]:
+    return list(iter_objects(bucket, prefix))
 
 def read_text(bucket: str, object_name: str) -> str:
     b = client.bucket(bucket)
@@ -29,7 +38,7 @@ def write_bytes(bucket: str, object_name: str, data: bytes, content_type: str) -
     blob.upload_from_string(data, content_type=content_type)
 
 def write_json(bucket: str, object_name: str, payload: dict) -> None:
-    write_text(bucket, object_name, json.dumps(payload, indent=2), content_type="application/json")
+    write_bytes(bucket, object_name, orjson.dumps(payload, option=orjson.OPT_INDENT_2), content_type="application/json")
 
 def copy_object(bucket: str, src_name: str, dst_name: str) -> None:
     b = client.bucket(bucket)
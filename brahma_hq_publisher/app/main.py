@@ -1,15 +1,22 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.responses import PlainTextResponse
-from google.cloud import storage
+from google.api_core.exceptions import NotFound
 from datetime import timedelta
 
 from .models import PublishRequest, PublishResponse, ActiveReleaseResponse, SignedDownloadsResponse
 from .publisher import publish_release
 from .config import GCS_BUCKET, ACTIVE_OBJECT, RELEASE_ROOT, SIGN_URL_MINUTES, PRODUCT_DB_NAME
-from .gcs_utils import read_text, list_objects, exists
+from .gcs_utils import client, read_text, list_objects
 
 app = FastAPI(title="Brahma HQ Publisher", version="1.0.0")
-client = storage.Client()
+
+def _active_release_id() -> str:
+    # Read the pointer directly; a missing object surfaces as NotFound, so no
+    # separate exists() round-trip is needed.
+    try:
+        return read_text(GCS_BUCKET, ACTIVE_OBJECT).strip()
+    except NotFound:
+        raise HTTPException(status_code=404, detail="ACTIVE pointer not found")
 
 @app.get("/health")
 def health():
@@ -26,9 +33,7 @@ def publish(req: PublishRequest):
 @app.get("/active", response_model=ActiveReleaseResponse)
 def active():
     try:
-        if not exists(GCS_BUCKET, ACTIVE_OBJECT):
-            raise HTTPException(status_code=404, detail="ACTIVE pointer not found")
-        rid = read_text(GCS_BUCKET, ACTIVE_OBJECT).strip()
+        rid = _active_release_id()
         return {
             "active_release_id": rid,
             "release_prefix": f"{RELEASE_ROOT}/{rid}"
@@ -40,7 +45,7 @@ def active():
 
 @app.get("/active/raw", response_class=PlainTextResponse)
 def active_raw():
-    rid = read_text(GCS_BUCKET, ACTIVE_OBJECT).strip()
+    rid = _active_release_id()
     return rid + "\n"
 
 @app.get("/active/signed", response_model=SignedDownloadsResponse)
@@ -51,23 +56,28 @@ def active_signed():
       - all standards yaml
       - manifest.json
     """
-    rid = read_text(GCS_BUCKET, ACTIVE_OBJECT).strip()
+    rid = _active_release_id()
     prefix = f"{RELEASE_ROOT}/{rid}"
 
     # find files in release
     sqlite_obj = f"{prefix}/compiled/{PRODUCT_DB_NAME}"
     manifest_obj = f"{prefix}/manifest.json"
 
+    # One listing of the release answers every existence check (instead of a
+    # HEAD request per object before signing).
+    release_objects = list_objects(GCS_BUCKET, f"{prefix}/")
+    present = set(release_objects)
+
     standards_prefix = f"{prefix}/02_Databases/Standards/"
-    standards = [o for o in list_objects(GCS_BUCKET, standards_prefix) if o.lower().endswith((".yaml", ".yml"))]
+    standards = [o for o in release_objects
+                 if o.startswith(standards_prefix) and o.lower().endswith((".yaml", ".yml"))]
 
     bucket = client.bucket(GCS_BUCKET)
 
     def sign(obj: str, content_type: str = "application/octet-stream") -> str:
-        blob = bucket.blob(obj)
-        if not blob.exists():
+        if obj not in present:
             raise HTTPException(status_code=404, detail=f"Missing object: {obj}")
-        return blob.generate_signed_url(
+        return bucket.blob(obj).generate_signed_url(
             version="v4",
             expiration=timedelta(minutes=SIGN_URL_MINUTES),
             method="GET",
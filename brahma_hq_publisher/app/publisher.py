@@ -1,20 +1,31 @@
 import datetime as dt
+import hashlib
 import json
-import os
 import sqlite3
-import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from typing import Dict, List, Tuple
 
+import orjson
+
 from .config import (
     GCS_BUCKET, MASTER_ROOT, STANDARDS_ROOT, RELEASE_ROOT, ACTIVE_OBJECT,
     SCHEMA_VERSION, PRODUCT_DB_NAME
 )
 from .gcs_utils import (
-    list_objects, read_bytes, read_text, write_bytes, write_text, write_json, copy_object
+    iter_objects, list_objects, read_bytes, read_text, write_bytes, write_text, write_json, copy_object
 )
 
 REQUIRED_FIELDS = ["mfr", "model"]  # minimum keys
 
+# Keys that map onto fixed columns (or are stored separately), never dynamic ones.
+_MODULE_BASE_KEYS = {"key", "key_text", "variants", "mfr", "model", "source_pdf", "source_metadata", "payload_json"}
+_VARIANT_BASE_KEYS = {"variant_id", "module_key", "variant_key", "payload_json"}
+
+# Master JSON reads and standards copies are small and latency-bound; run
+# them concurrently.
+_io_pool = ThreadPoolExecutor(max_workers=32)
+
 
 def _quote_ident(name: str) -> str:
     """Safe identifier quoting for SQLite."""
@@ -22,36 +33,59 @@ def _quote_ident(name: str) -> str:
     return f'"{safe}"'
 
 
-def _ensure_columns(cur: sqlite3.Cursor, table: str, cols: List[str]) -> None:
-    """ALTER TABLE ADD COLUMN for any missing columns (as TEXT).
+def _module_key(key_text: str) -> int:
+    """Stable signed 64-bit id for a "mfr::model" key (fits SQLite INTEGER)."""
+    digest = hashlib.blake2b(key_text.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
 
-    We store dynamic columns as TEXT to preserve mixed values
-    (e.g., "45±2 °C", "1500 VDC", "5400 Pa").
-    """
-    cur.execute(f"PRAGMA table_info({_quote_ident(table)})")
-    existing = {r[1] for r in cur.fetchall()}  # (cid, name, type, ...)
-    for c in cols:
-        if c in existing:
-            continue
-        # TEXT default '' to avoid NULL in selects
-        cur.execute(
-            f"ALTER TABLE {_quote_ident(table)} ADD COLUMN {_quote_ident(c)} TEXT DEFAULT ''"
-        )
+
+def _upsert_sql(table: str, cols: List[str], conflict: List[str]) -> str:
+    """INSERT ... ON CONFLICT DO UPDATE over `cols` (one ? per column)."""
+    col_sql = ",".join(_quote_ident(c) for c in cols)
+    placeholders = ",".join(["?"] * len(cols))
+    conflict_sql = ", ".join(conflict)
+    update_sql = ",".join(
+        f"{_quote_ident(c)}=excluded.{_quote_ident(c)}" for c in cols if c not in conflict
+    )
+    return (
+        f"INSERT INTO {table} ({col_sql}) VALUES ({placeholders}) "
+        f"ON CONFLICT({conflict_sql}) DO UPDATE SET {update_sql}"
+    )
 
 
 def _to_text(v) -> str:
     """Coerce any value into TEXT (never None)."""
+    # Most cells are already str: one pointer compare, no allocation.
+    if type(v) is str:
+        return v
     if v is None:
         return ""
     if isinstance(v, (dict, list)):
-        return json.dumps(v, ensure_ascii=False)
+        return orjson.dumps(v).decode("utf-8")
     return str(v)
 
+def _executemany_chunked(cur: sqlite3.Cursor, sql: str, params, chunk_size: int = 1000) -> None:
+    """executemany over `params` in fixed-size batches (bounded tuple buffers)."""
+    it = iter(params)
+    while batch := list(islice(it, chunk_size)):
+        cur.executemany(sql, batch)
+
+def _text_column(items: List[dict], key: str):
+    """Lazily yield `key` from each dict as TEXT, for zipping into executemany."""
+    return (_to_text(d.get(key, "")) for d in items)
+
 def _utc_release_id() -> str:
     # db_release_YYYYMMDD_HHMMSSZ
     return dt.datetime.utcnow().strftime("db_release_%Y%m%d_%H%M%SZ")
 
 def _safe_json_load(raw: bytes, path: str) -> dict:
+    try:
+        # orjson parses the bytes directly (and rejects invalid UTF-8 itself)
+        return orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        pass
+    # Older master files may hold NaN/Infinity (written by json.dumps), which
+    # orjson rejects; the stdlib parser still accepts them.
     try:
         return json.loads(raw.decode("utf-8"))
     except Exception as e:
@@ -59,8 +93,10 @@ def _safe_json_load(raw: bytes, path: str) -> dict:
 
 def _collect_master_jsons() -> List[str]:
     # list all JSON under 03_MasterData/modules/...
-    all_objs = list_objects(GCS_BUCKET, MASTER_ROOT + "/")
-    return [o for o in all_objs if o.lower().endswith(".json")]
+    return [o for o in iter_objects(GCS_BUCKET, MASTER_ROOT + "/") if o.lower().endswith(".json")]
+
+def _load_master_json(path: str) -> dict:
+    return _safe_json_load(read_bytes(GCS_BUCKET, path), path)
 
 def _validate_rows(rows: List[dict]) -> Tuple[List[dict], int]:
     ok = []
@@ -72,6 +108,13 @@ def _validate_rows(rows: List[dict]) -> Tuple[List[dict], int]:
         if any((k not in r or r.get(k) in [None, ""]) for k in REQUIRED_FIELDS):
             bad += 1
             continue
+        # Normalize variants to a list of dicts here so the build loop can
+        # trust the shape (only malformed rows are rewritten).
+        variants = r.get("variants")
+        if variants is not None and not (
+            isinstance(variants, list) and all(isinstance(vv, dict) for vv in variants)
+        ):
+            r["variants"] = [vv for vv in variants if isinstance(vv, dict)] if isinstance(variants, list) else []
         ok.append(r)
     return ok, bad
 
@@ -79,7 +122,7 @@ def _build_sqlite(rows: List[dict], release_id: str) -> bytes:
     """Build SQLite with dynamic schema evolution.
 
     Requirements satisfied:
-      1) If new datasheets introduce new columns, we auto-add them (ALTER TABLE).
+      1) If new datasheets introduce new columns, the tables are created with them.
       2) Mixed int/str values are preserved by storing dynamic columns as TEXT.
       3) Avoid NULLs: every stored cell is TEXT with DEFAULT '' and we coerce None -> ''.
 
@@ -88,151 +131,136 @@ def _build_sqlite(rows: List[dict], release_id: str) -> bytes:
       - module_variants (0..N rows per module; STC/NOCT etc)
       - meta
     """
-    with tempfile.TemporaryDirectory() as td:
-        db_path = os.path.join(td, PRODUCT_DB_NAME)
-        con = sqlite3.connect(db_path)
-        cur = con.cursor()
-
-        # Base tables (dynamic columns are added later as needed)
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS modules (
-                key TEXT PRIMARY KEY,
-                mfr TEXT DEFAULT '',
-                model TEXT DEFAULT '',
-                source_pdf TEXT DEFAULT '',
-                source_metadata TEXT DEFAULT '',
-                payload_json TEXT DEFAULT ''
-            )
-            """
-        )
-
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS module_variants (
-                variant_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                module_key TEXT NOT NULL,
-                variant_key TEXT NOT NULL,
-                payload_json TEXT DEFAULT '',
-                UNIQUE(module_key, variant_key)
-            )
-            """
-        )
-
-        cur.execute("CREATE INDEX IF NOT EXISTS idx_modules_mfr ON modules(mfr)")
-        cur.execute("CREATE INDEX IF NOT EXISTS idx_modules_model ON modules(model)")
-        cur.execute("CREATE INDEX IF NOT EXISTS idx_variants_module ON module_variants(module_key)")
-
-        # Determine the union of module-level keys (excluding variants)
-        module_dynamic_keys = set()
-        variant_dynamic_keys = set()
-        for r in rows:
-            for k in r.keys():
-                if k in {"variants"}:
-                    continue
-                if k in {"key"}:
-                    continue
-                # base cols are already present
-                if k in {"mfr", "model", "source_pdf", "source_metadata", "payload_json"}:
-                    continue
-                module_dynamic_keys.add(str(k))
-
-            for vv in (r.get("variants") or []):
-                if isinstance(vv, dict):
-                    for kk in vv.keys():
-                        if kk in {"payload_json"}:
-                            continue
-                        variant_dynamic_keys.add(str(kk))
-
-        # ensure all dynamic columns exist as TEXT
-        _ensure_columns(cur, "modules", sorted(module_dynamic_keys))
-        _ensure_columns(cur, "module_variants", sorted(variant_dynamic_keys))
-
-        # Upsert modules and variants
-        for r in rows:
-            mfr = _to_text(r.get("mfr")).strip()
-            model = _to_text(r.get("model")).strip()
-            key = f"{mfr.lower()}::{model.lower()}"
-
-            payload_json = json.dumps(r, ensure_ascii=False)
-
-            # Build insert dict for modules
-            row_data = {
-                "key": key,
-                "mfr": mfr,
-                "model": model,
-                "source_pdf": _to_text(r.get("source_pdf")),
-                "source_metadata": _to_text(r.get("source_metadata")),
-                "payload_json": payload_json,
-            }
-
-            # dynamic fields (TEXT) - coerce None -> ''
-            for k in module_dynamic_keys:
-                row_data[k] = _to_text(r.get(k, ""))
-
-            cols = list(row_data.keys())
-            placeholders = ",".join(["?"] * len(cols))
-            col_sql = ",".join([_quote_ident(c) for c in cols])
-            update_sql = ",".join([f"{_quote_ident(c)}=excluded.{_quote_ident(c)}" for c in cols if c != "key"])
-
-            cur.execute(
-                f"INSERT INTO modules ({col_sql}) VALUES ({placeholders}) "
-                f"ON CONFLICT(key) DO UPDATE SET {update_sql}",
-                [row_data[c] for c in cols],
-            )
-
-            # Variants
-            variants = r.get("variants") or []
-            if isinstance(variants, list):
-                for vv in variants:
-                    if not isinstance(vv, dict):
-                        continue
-                    # Prefer pmax_w as stable id; else hash of payload
-                    pmax = _to_text(vv.get("pmax_w")).strip()
-                    variant_key = pmax if pmax else json.dumps(vv, ensure_ascii=False)
-
-                    v_payload = json.dumps(vv, ensure_ascii=False)
-                    v_data = {
-                        "module_key": key,
-                        "variant_key": variant_key,
-                        "payload_json": v_payload,
-                    }
-                    for kk in variant_dynamic_keys:
-                        v_data[kk] = _to_text(vv.get(kk, ""))
-
-                    v_cols = list(v_data.keys())
-                    v_placeholders = ",".join(["?"] * len(v_cols))
-                    v_col_sql = ",".join([_quote_ident(c) for c in v_cols])
-                    v_update_sql = ",".join(
-                        [f"{_quote_ident(c)}=excluded.{_quote_ident(c)}" for c in v_cols if c not in {"variant_id"}]
-                    )
-
-                    cur.execute(
-                        f"INSERT INTO module_variants ({v_col_sql}) VALUES ({v_placeholders}) "
-                        f"ON CONFLICT(module_key, variant_key) DO UPDATE SET {v_update_sql}",
-                        [v_data[c] for c in v_cols],
-                    )
-
-        # meta table
-        cur.execute("""
-        CREATE TABLE IF NOT EXISTS meta (
-            release_id TEXT,
-            created_at_utc TEXT,
-            schema_version TEXT,
-            count_modules INTEGER
+    # Build in memory and serialize: no temp file to write and read back.
+    # isolation_level=None: no implicit BEGIN heuristics; the transaction is
+    # managed explicitly below.
+    con = sqlite3.connect(":memory:", isolation_level=None)
+    cur = con.cursor()
+    # The DB is a throwaway build artifact (we upload the bytes), so skip
+    # journaling/fsync and run the whole build as one transaction.
+    cur.executescript(
+        "PRAGMA journal_mode=OFF;"
+        "PRAGMA synchronous=OFF;"
+        "PRAGMA temp_store=MEMORY;"
+        "PRAGMA locking_mode=EXCLUSIVE;"
+        "PRAGMA cache_size=-65536;"
+    )
+    cur.execute("BEGIN")
+
+    # Single pass over the rows: fixed columns go straight into per-column
+    # lists and the dynamic keys are collected on the way.
+    keys, key_texts, mfrs, models, source_pdfs, source_metas, payloads = [], [], [], [], [], [], []
+    variant_rows, v_module_keys, v_keys, v_payloads = [], [], [], []
+    module_dynamic_keys = set()
+    variant_dynamic_keys = set()
+    for r in rows:
+        mfr = _to_text(r.get("mfr")).strip()
+        model = _to_text(r.get("model")).strip()
+        key_text = f"{mfr.lower()}::{model.lower()}"
+        key = _module_key(key_text)
+
+        keys.append(key)
+        key_texts.append(key_text)
+        mfrs.append(mfr)
+        models.append(model)
+        source_pdfs.append(_to_text(r.get("source_pdf")))
+        source_metas.append(_to_text(r.get("source_metadata")))
+        payloads.append(orjson.dumps(r).decode("utf-8"))
+        module_dynamic_keys.update(r.keys())
+
+        # Variants (a list of dicts, see _validate_rows)
+        for vv in r.get("variants") or ():
+            # Prefer pmax_w as stable id; else hash of payload
+            pmax = _to_text(vv.get("pmax_w")).strip()
+            v_payload = orjson.dumps(vv).decode("utf-8")
+
+            variant_rows.append(vv)
+            v_module_keys.append(key)
+            v_keys.append(pmax if pmax else v_payload)
+            v_payloads.append(v_payload)
+            variant_dynamic_keys.update(vv.keys())
+
+    # keys that map onto base cols are not dynamic
+    module_dynamic_keys = tuple(sorted(module_dynamic_keys - _MODULE_BASE_KEYS))
+    variant_dynamic_keys = tuple(sorted(variant_dynamic_keys - _VARIANT_BASE_KEYS))
+
+    # Fresh DB: the full column set is known, so create the tables with
+    # every dynamic column up front (TEXT DEFAULT '' to preserve mixed values
+    # such as "45±2 °C" and avoid NULLs) instead of ALTERing them in.
+    module_dyn_sql = "".join(f",\n            {_quote_ident(c)} TEXT DEFAULT ''" for c in module_dynamic_keys)
+    variant_dyn_sql = "".join(f",\n            {_quote_ident(c)} TEXT DEFAULT ''" for c in variant_dynamic_keys)
+    cur.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS modules (
+            key INTEGER PRIMARY KEY,
+            key_text TEXT DEFAULT '',
+            mfr TEXT DEFAULT '',
+            model TEXT DEFAULT '',
+            source_pdf TEXT DEFAULT '',
+            source_metadata TEXT DEFAULT '',
+            payload_json TEXT DEFAULT ''{module_dyn_sql}
         )
-        """)
-        cur.execute("DELETE FROM meta")
-        cur.execute(
-            "INSERT INTO meta(release_id, created_at_utc, schema_version, count_modules) VALUES(?,?,?,?)",
-            (release_id, dt.datetime.utcnow().isoformat() + "Z", SCHEMA_VERSION, len(rows))
+        """
+    )
+
+    cur.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS module_variants (
+            variant_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            module_key INTEGER NOT NULL,
+            variant_key TEXT NOT NULL,
+            payload_json TEXT DEFAULT ''{variant_dyn_sql},
+            UNIQUE(module_key, variant_key)
         )
-
-        con.commit()
-        con.close()
-
-        with open(db_path, "rb") as f:
-            return f.read()
+        """
+    )
+
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_modules_key_text ON modules(key_text)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_modules_mfr ON modules(mfr)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_modules_model ON modules(model)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_variants_module ON module_variants(module_key)")
+
+    # Upsert modules and variants. The column lists are fixed at this
+    # point, so each statement is built once and run via executemany over
+    # the zipped columns; dynamic fields (TEXT) coerce None -> ''.
+    module_sql = _upsert_sql(
+        "modules",
+        ["key", "key_text", "mfr", "model", "source_pdf", "source_metadata", "payload_json", *module_dynamic_keys],
+        ["key"],
+    )
+    variant_sql = _upsert_sql(
+        "module_variants",
+        ["module_key", "variant_key", "payload_json", *variant_dynamic_keys],
+        ["module_key", "variant_key"],
+    )
+
+    module_columns = [keys, key_texts, mfrs, models, source_pdfs, source_metas, payloads]
+    module_columns += [_text_column(rows, k) for k in module_dynamic_keys]
+    _executemany_chunked(cur, module_sql, zip(*module_columns))
+
+    variant_columns = [v_module_keys, v_keys, v_payloads]
+    variant_columns += [_text_column(variant_rows, kk) for kk in variant_dynamic_keys]
+    _executemany_chunked(cur, variant_sql, zip(*variant_columns))
+
+    # meta table
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS meta (
+        release_id TEXT,
+        created_at_utc TEXT,
+        schema_version TEXT,
+        count_modules INTEGER
+    )
+    """)
+    cur.execute("DELETE FROM meta")
+    cur.execute(
+        "INSERT INTO meta(release_id, created_at_utc, schema_version, count_modules) VALUES(?,?,?,?)",
+        (release_id, dt.datetime.utcnow().isoformat() + "Z", SCHEMA_VERSION, len(rows))
+    )
+
+    cur.execute("COMMIT")
+    data = con.serialize()
+    con.close()
+    return data
 
 def publish_release(release_notes: str, dry_run: bool = False) -> Dict:
     release_id = _utc_release_id()
@@ -240,10 +268,7 @@ def publish_release(release_notes: str, dry_run: bool = False) -> Dict:
 
     # 1) load master JSONs
     paths = _collect_master_jsons()
-    raw_rows = []
-    for p in paths:
-        raw = read_bytes(GCS_BUCKET, p)
-        raw_rows.append(_safe_json_load(raw, p))
+    raw_rows = list(_io_pool.map(_load_master_json, paths))
 
     rows, bad_count = _validate_rows(raw_rows)
 
@@ -306,12 +331,15 @@ def publish_release(release_notes: str, dry_run: bool = False) -> Dict:
     }
     write_json(GCS_BUCKET, out_manifest, manifest)
 
-    # 5) copy standards yaml into release folder
-    for s in standards:
+    # 5) copy standards yaml into release folder (in parallel; list() re-raises
+    #    the first failure before ACTIVE is updated)
+    def copy_standard(s: str) -> None:
         rel_name = s.replace(STANDARDS_ROOT + "/", "")
         dst = f"{release_prefix}/02_Databases/Standards/{rel_name}"
         copy_object(GCS_BUCKET, s, dst)
 
+    list(_io_pool.map(copy_standard, standards))
+
     # 6) update ACTIVE pointer
     write_text(GCS_BUCKET, ACTIVE_OBJECT, release_id + "\n")
 
@@ -1,18 +1,39 @@
 import json
+import orjson
 from google.cloud import storage
 
 client = storage.Client()
 
-def list_blobs(bucket: str, prefix: str):
-    b = client.bucket(bucket)
-    return [x.name for x in client.list_blobs(b, prefix=prefix)]
+def _iter_listing(bucket: str, prefix: str, suffix: str, fields: str):
+    # filtered while paging (1000 per page, the max), never listed up front
+    blobs = client.list_blobs(client.bucket(bucket), prefix=prefix, fields=f"items({fields}),nextPageToken", page_size=1000)
+    return (x for x in blobs if not suffix or x.name.endswith(suffix))
+
+def list_blobs(bucket: str, prefix: str, suffix: str = None):
+    return (x.name for x in _iter_listing(bucket, prefix, suffix, "name"))
+
+def list_blobs_with_metadata(bucket: str, prefix: str, suffix: str = None):
+    """Like list_blobs, but yields (name, custom metadata or None) pairs."""
+    return ((x.name, x.metadata) for x in _iter_listing(bucket, prefix, suffix, "name,metadata"))
 
 def read_json(bucket: str, path: str):
     blob = client.bucket(bucket).blob(path)
     return json.loads(blob.download_as_text())
 
-def write_json(bucket: str, path: str, obj: dict):
-    client.bucket(bucket).blob(path).upload_from_string(
-        json.dumps(obj, indent=2),
-        content_type="application/json"
+def read_json_with_generation(bucket: str, path: str):
+    """Return (obj, generation); the generation comes from the download headers."""
+    blob = client.bucket(bucket).blob(path)
+    obj = json.loads(blob.download_as_text())
+    return obj, blob.generation
+
+def write_json(bucket: str, path: str, obj: dict, metadata: dict = None, if_generation_match: int = None):
+    """Compact JSON (orjson): candidates, review records, master data."""
+    blob = client.bucket(bucket).blob(path)
+    if metadata:
+        # custom metadata goes up in the same request as the body
+        blob.metadata = metadata
+    blob.upload_from_string(
+        orjson.dumps(obj),
+        content_type="application/json",
+        if_generation_match=if_generation_match,
     )
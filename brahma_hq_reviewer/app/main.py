@@ -1,29 +1,32 @@
 from __future__ import annotations
 
 import datetime as dt
+import hashlib
 import json
+import math
 import os
 import secrets
 import uuid
-from io import BytesIO
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
 
 from fastapi import Depends, FastAPI, Form, HTTPException, Query, Request
 from fastapi.responses import HTMLResponse, StreamingResponse
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
 from fastapi.templating import Jinja2Templates
-from google.api_core.exceptions import Forbidden, NotFound
-from google.cloud import storage
+from google.api_core.exceptions import Forbidden, NotFound, PreconditionFailed
 
 from app.config import GCS_BUCKET, MASTER_ROOT, RELEASE_ROOT
-from app.gcs import list_blobs, read_json, write_json
+from app.gcs import (
+    client as gcs_client, list_blobs, list_blobs_with_metadata, read_json, read_json_with_generation, write_json,
+)
 from app.models import ReviewRequest
 from app.utils import safe_key, utc_now_iso
 
 app = FastAPI(title="Brahma HQ Reviewer", version="1.0")
 
-# ---- GCS client ----
-gcs_client = storage.Client()
+# Candidate reads for the pending filter are small and latency-bound.
+io_pool = ThreadPoolExecutor(max_workers=32)
 
 # ---- Templates ----
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # /app
@@ -33,6 +36,10 @@ templates = Jinja2Templates(directory=os.path.join(BASE_DIR, "templates"))
 security = HTTPBasic()
 BASIC_USER = os.getenv("BASIC_USER", "admin")
 BASIC_PASS = os.getenv("BASIC_PASS", "admin123")
+# Compared as bytes / SHA-256 digests (fixed length, non-ASCII safe).
+# BASIC_PASS_SHA256 (hex) lets the deployment keep only the hash.
+_USER_B = BASIC_USER.encode("utf-8")
+_PASS_HASH = bytes.fromhex(os.getenv("BASIC_PASS_SHA256", "")) or hashlib.sha256(BASIC_PASS.encode("utf-8")).digest()
 
 
 def require_basic(credentials: HTTPBasicCredentials = Depends(security)) -> bool:
@@ -40,8 +47,10 @@ def require_basic(credentials: HTTPBasicCredentials = Depends(security)) -> bool
     IMPORTANT: To force browser login prompt, we MUST return 401 with
     'WWW-Authenticate: Basic' header.
     """
-    ok_user = secrets.compare_digest(credentials.username, BASIC_USER)
-    ok_pass = secrets.compare_digest(credentials.password, BASIC_PASS)
+    ok_user = secrets.compare_digest(credentials.username.encode("utf-8"), _USER_B)
+    ok_pass = secrets.compare_digest(
+        hashlib.sha256(credentials.password.encode("utf-8")).digest(), _PASS_HASH
+    )
     if not (ok_user and ok_pass):
         raise HTTPException(
             status_code=401,
@@ -65,6 +74,37 @@ def derive_pdf_object_path(cand: dict) -> str:
     return ""
 
 
+def review_flags(cand: dict) -> dict:
+    """Object metadata mirroring the fields the pending filter looks at."""
+    return {
+        "needs_review": "true" if cand.get("needs_review", True) is True else "false",
+        "status": str(cand.get("status") or ""),
+    }
+
+
+def _is_pending(path: str) -> bool:
+    try:
+        c = read_json(GCS_BUCKET, path)
+    except Exception:
+        # if candidate json broken, keep it visible so it can be fixed
+        return True
+    return c.get("needs_review", True) is True and c.get("status") not in ("approved", "rejected")
+
+
+def _iter_blob(blob, chunk_size: int = 1 << 20):
+    """Yield an object's bytes chunk by chunk (ranged reads, O(chunk) memory)."""
+    with blob.open("rb", chunk_size=chunk_size) as f:
+        while True:
+            data = f.read(chunk_size)
+            if not data:
+                return
+            yield data
+
+
+def _is_pending_meta(metadata: dict) -> bool:
+    return metadata["needs_review"] == "true" and metadata.get("status") not in ("approved", "rejected")
+
+
 # -------------------- Health --------------------
 
 @app.get("/")
@@ -76,7 +116,7 @@ def health():
 
 @app.get("/candidates")
 def candidates(prefix: str = Query("02_Candidates/"), _=Depends(require_basic)):
-    paths = [p for p in list_blobs(GCS_BUCKET, prefix) if p.endswith(".json")]
+    paths = list(list_blobs(GCS_BUCKET, prefix, suffix=".json"))
     return {"count": len(paths), "items": paths}
 
 
@@ -88,14 +128,36 @@ def candidate(path: str, _=Depends(require_basic)):
         raise HTTPException(status_code=404, detail=str(e))
 
 
-def _process_review(req: ReviewRequest) -> dict:
+def _update_candidate(path: str, cand: dict, generation: int, changes: dict, attempts: int = 3) -> dict:
+    """
+    Apply `changes` on top of the candidate and write it back, only if the
+    object is still at `generation`. If another review wrote it meanwhile,
+    re-read and re-apply instead of clobbering that write. No-op updates
+    are not uploaded.
+    """
+    for _ in range(attempts):
+        cand_update = {**cand, **changes}
+        if cand_update == cand:
+            return cand_update
+        try:
+            write_json(GCS_BUCKET, path, cand_update, metadata=review_flags(cand_update),
+                       if_generation_match=generation)
+            return cand_update
+        except PreconditionFailed:
+            cand, generation = read_json_with_generation(GCS_BUCKET, path)
+    raise HTTPException(status_code=409, detail=f"Candidate kept changing during review: {path}")
+
+
+def _process_review(req: ReviewRequest) -> Tuple[dict, dict]:
     """
     Shared business logic:
     - write review log
     - if approved: write masterdata json
     - ALWAYS update candidate json so it disappears from pending list
+
+    Returns (result, updated candidate as written).
     """
-    cand = read_json(GCS_BUCKET, req.candidate_path)
+    cand, generation = read_json_with_generation(GCS_BUCKET, req.candidate_path)
 
     review_id = uuid.uuid4().hex[:16]
     reviewed_at = utc_now_iso()
@@ -120,17 +182,16 @@ def _process_review(req: ReviewRequest) -> dict:
 
     # ----- REJECT / OTHER -----
     if req.decision != "approved":
-        cand_update = dict(final_obj)
-        cand_update.update({
+        cand_update = _update_candidate(req.candidate_path, cand, generation, {
+            **(req.patch or {}),
             "status": req.decision,      # "rejected" etc.
             "needs_review": False,
             "reviewed_at_utc": reviewed_at,
             "reviewed_by": req.reviewer,
             "review_path": review_path,
         })
-        write_json(GCS_BUCKET, req.candidate_path, cand_update)
 
-        return {"status": "recorded", "review_path": review_path}
+        return {"status": "recorded", "review_path": review_path}, cand_update
 
     # ----- APPROVE -----
     mfr = final_obj.get("mfr") or final_obj.get("manufacturer") or "unknown"
@@ -138,32 +199,32 @@ def _process_review(req: ReviewRequest) -> dict:
 
     out_path = f"03_MasterData/modules/{safe_key(mfr)}/{safe_key(model)}.json"
 
-    final_obj.update(
-        {
-            "status": "approved",
-            "approved_at_utc": reviewed_at,
-            "approved_by": req.reviewer,
-            "source_candidate_path": req.candidate_path,
-            "review_id": review_id,
-            "review_path": review_path,
-        }
-    )
+    approval = {
+        "status": "approved",
+        "approved_at_utc": reviewed_at,
+        "approved_by": req.reviewer,
+        "source_candidate_path": req.candidate_path,
+        "review_id": review_id,
+        "review_path": review_path,
+    }
+    final_obj.update(approval)
     write_json(GCS_BUCKET, out_path, final_obj)
 
     # Update candidate so it won't show again
-    cand_update = dict(final_obj)
-    cand_update.update({
+    cand_update = _update_candidate(req.candidate_path, cand, generation, {
+        **(req.patch or {}),
+        **approval,
         "needs_review": False,
         "masterdata_path": out_path,
     })
-    write_json(GCS_BUCKET, req.candidate_path, cand_update)
 
-    return {"status": "approved", "review_path": review_path, "masterdata_path": out_path}
+    return {"status": "approved", "review_path": review_path, "masterdata_path": out_path}, cand_update
 
 
 @app.post("/review")
 def review(req: ReviewRequest, _=Depends(require_basic)):
-    return _process_review(req)
+    result, _cand = _process_review(req)
+    return result
 
 
 # -------------------- UI routes (Basic Auth protected) --------------------
@@ -180,24 +241,22 @@ def ui_index(
     If show_all=true, shows everything.
     """
     try:
-        all_paths = [p for p in list_blobs(GCS_BUCKET, prefix) if p.endswith(".json")]
+        listing = list(list_blobs_with_metadata(GCS_BUCKET, prefix, suffix=".json"))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"GCS list failed for prefix={prefix}: {e}")
 
-    items = []
-    for p in all_paths:
-        if show_all:
-            items.append(p)
-            continue
-
-        # pending-only filter
-        try:
-            c = read_json(GCS_BUCKET, p)
-            if c.get("needs_review", True) is True and c.get("status") not in ("approved", "rejected"):
-                items.append(p)
-        except Exception:
-            # if candidate json broken, keep it visible so it can be fixed
-            items.append(p)
+    if show_all:
+        items = [p for p, _meta in listing]
+    else:
+        # pending-only filter: use the review flags stored as object metadata;
+        # candidates without them (never reviewed, or written before the flags
+        # existed) are read concurrently instead.
+        unflagged = [p for p, meta in listing if not (meta and "needs_review" in meta)]
+        pending = dict(zip(unflagged, io_pool.map(_is_pending, unflagged)))
+        items = [
+            p for p, meta in listing
+            if (pending[p] if p in pending else _is_pending_meta(meta))
+        ]
 
     return templates.TemplateResponse(
         "index.html",
@@ -281,9 +340,11 @@ def ui_review_post(
         if not v:
             return None
         try:
-            return float(v)
+            f = float(v)
         except Exception:
             return None
+        # "nan"/"inf" parse as floats but are not valid JSON values
+        return f if math.isfinite(f) else None
 
     patch = {
         "mfr": (mfr or "").strip() or None,
@@ -309,10 +370,8 @@ def ui_review_post(
         patch=patch,
     )
 
-    result_obj = _process_review(req)
-
-    # reload candidate for display (will now contain status/needs_review updates)
-    cand = read_json(GCS_BUCKET, candidate_path)
+    # the returned candidate is what was just written (status/needs_review updates)
+    result_obj, cand = _process_review(req)
     cand_pretty = json.dumps(cand, indent=2)
     pdf_object_path = derive_pdf_object_path(cand)
 
@@ -336,16 +395,19 @@ def ui_pdf(object_path: str, _=Depends(require_basic)):
     try:
         blob = gcs_client.bucket(GCS_BUCKET).blob(object_path)
 
-        if not blob.exists():
-            raise HTTPException(status_code=404, detail=f"PDF not found: {object_path}")
-
-        data = blob.download_as_bytes()
+        # One metadata GET: size for Content-Length, and NotFound (-> 404) if
+        # the object is missing. The reload also pins the generation, so the
+        # ranged reads below all see the same version.
+        blob.reload()
         filename = object_path.split("/")[-1] or "datasheet.pdf"
 
         return StreamingResponse(
-            BytesIO(data),
+            _iter_blob(blob),
             media_type="application/pdf",
-            headers={"Content-Disposition": f'inline; filename="{filename}"'},
+            headers={
+                "Content-Disposition": f'inline; filename="{filename}"',
+                "Content-Length": str(blob.size),
+            },
         )
 
     except Forbidden:
@@ -4,7 +4,7 @@ from datetime import datetime, timezone
 def utc_now_iso():
     return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
 
+_SAFE_KEY_RE = re.compile(r"[^a-z0-9]+")
+
 def safe_key(s: str):
-    s = s.strip().lower()
-    s = re.sub(r"[^a-z0-9]+", "_", s)
-    return s.strip("_")
+    return _SAFE_KEY_RE.sub("_", s.strip().lower()).strip("_")
@@ -2,4 +2,7 @@ import os
 
 GCS_BUCKET = os.getenv("GCS_BUCKET", "brahma-hq-prod")
 
+# Browser/CDN cache lifetime for the static UI page (seconds)
+UI_MAX_AGE = int(os.getenv("UI_MAX_AGE", "3600"))
 
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
@@ -1,28 +1,86 @@
 from datetime import timedelta
-import json
+from functools import lru_cache
+import threading
+import google.auth
+import google.auth.credentials
+import google.auth.transport.requests
+import orjson
+from cachetools import TTLCache
 from google.cloud import storage
+from google.cloud.storage.retry import DEFAULT_RETRY
+
+# One client per process: credentials discovery and the HTTP session are
+# set up once instead of on every request. The same credentials sign URLs.
+_credentials, _project = google.auth.default()
+client = storage.Client(credentials=_credentials, project=_project)
+
+# Token refreshes (only when the cached token expires) reuse one session.
+_auth_request = google.auth.transport.requests.Request()
+_credentials_lock = threading.Lock()
+
+SIGNED_URL_EXPIRATION = timedelta(minutes=15)
+
+# Signing is CPU-bound (RSA). Repeat requests for the same object reuse the
+# URL; entries live for half the expiry, so a cached URL always has at least
+# half its lifetime left.
+_signed_urls = TTLCache(maxsize=10_000, ttl=SIGNED_URL_EXPIRATION.total_seconds() // 2)
+_signed_urls_lock = threading.Lock()
+
+@lru_cache(maxsize=16)
+def _bucket(bucket_name: str) -> storage.Bucket:
+    return client.bucket(bucket_name)
+
+def _signing_kwargs() -> dict:
+    """
+    Service-account key credentials sign locally. Others (e.g. the Cloud Run
+    metadata-server credentials) sign through IAM signBlob with the cached
+    access token, refreshed only when it has expired.
+    """
+    if isinstance(_credentials, google.auth.credentials.Signing):
+        return {}
+    with _credentials_lock:
+        if not _credentials.valid:
+            _credentials.refresh(_auth_request)
+        return {
+            "service_account_email": _credentials.service_account_email,
+            "access_token": _credentials.token,
+        }
 
 def generate_signed_put_url(bucket_name: str, object_name: str, content_type: str) -> str:
-    client = storage.Client()
-    bucket = client.bucket(bucket_name)
-    blob = bucket.blob(object_name)
+    key = (bucket_name, object_name, content_type)
+    with _signed_urls_lock:
+        url = _signed_urls.get(key)
+    if url is not None:
+        return url
 
-    return blob.generate_signed_url(
+    blob = _bucket(bucket_name).blob(object_name)
+    url = blob.generate_signed_url(
         version="v4",
-        expiration=timedelta(minutes=15),
+        expiration=SIGNED_URL_EXPIRATION,
         method="PUT",
         content_type=content_type,
+        **_signing_kwargs(),
     )
+    with _signed_urls_lock:
+        _signed_urls[key] = url
+    return url
 
-def write_metadata_json(bucket_name: str, object_path: str, metadata: dict) -> str:
-    client = storage.Client()
-    bucket = client.bucket(bucket_name)
+def metadata_path_for(object_path: str) -> str:
+    """<name>.pdf -> <name>_metadata.json (suffix only; the extractor matches this)."""
+    stem = object_path[:-len(".pdf")] if object_path.endswith(".pdf") else object_path
+    return stem + "_metadata.json"
 
-    metadata_path = object_path.replace(".pdf", "_metadata.json")
-    blob = bucket.blob(metadata_path)
+def write_metadata_json(bucket_name: str, object_path: str, metadata: dict) -> str:
+    """Write the metadata JSON next to the PDF; returns the path written."""
+    metadata_path = metadata_path_for(object_path)
+    blob = _bucket(bucket_name).blob(metadata_path)
 
+    # The metadata is derived from the upload request, so overwriting on a
+    # retry is safe; without a generation precondition the default policy
+    # would not retry at all.
     blob.upload_from_string(
-        json.dumps(metadata, ensure_ascii=False, indent=2),
+        orjson.dumps(metadata),
         content_type="application/json",
+        retry=DEFAULT_RETRY,
     )
     return metadata_path
@@ -0,0 +1,61 @@
+import atexit
+import copy
+import logging
+import logging.handlers
+import queue
+import sys
+import time
+
+import orjson
+
+from .config import LOG_LEVEL
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line (Cloud Logging picks up severity/message)."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(record.created)),
+            "severity": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return orjson.dumps(entry).decode()
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    The stock prepare() formats the record and drops exc_info, which would
+    flatten tracebacks into "message". Only the message is resolved here
+    (args may change after the call); exc_info reaches JSONFormatter.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def setup_logging() -> logging.handlers.QueueListener:
+    """
+    Route the root logger through a QueueHandler: callers only enqueue the
+    record, and a QueueListener thread formats and writes it to stdout.
+    """
+    log_queue = queue.Queue(-1)
+
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(JSONFormatter())
+
+    root = logging.getLogger()
+    root.handlers[:] = [_QueueHandler(log_queue)]
+    root.setLevel(LOG_LEVEL)
+
+    listener = logging.handlers.QueueListener(log_queue, stream, respect_handler_level=True)
+    listener.start()
+    # drain whatever is still queued on exit
+    atexit.register(listener.stop)
+    return listener
@@ -1,44 +1,85 @@
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import HTMLResponse
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import HTMLResponse, ORJSONResponse, Response
+from google.api_core.exceptions import GoogleAPICallError
+from google.auth.exceptions import GoogleAuthError
 from pathlib import Path
-import mimetypes
+import asyncio
+import hashlib
+import logging
 
-from .config import GCS_BUCKET
+from .config import GCS_BUCKET, UI_MAX_AGE
 from .models import UploadRequest, UploadComplete
-from .utils import build_object_path
-from .gcs import write_metadata_json, generate_signed_put_url
+from .utils import build_object_path, validate_filetype
+from .gcs import metadata_path_for, write_metadata_json, generate_signed_put_url
+from .logs import setup_logging
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    await _start_metadata_writer()
+    yield
+    await _stop_metadata_writer()
 
 
 app = FastAPI(
     title="Brahma HQ Uploader",
     version="1.0",
+    lifespan=_lifespan,
     swagger_ui_parameters={"persistAuthorization": True},
+    # JSON replies are encoded with orjson instead of the stdlib encoder
+    default_response_class=ORJSONResponse,
 )
 
+# GCS / signing failures become a proper 500 with the reason (not 200 with
+# {"error": ...}); anything else falls through to the default 500.
+@app.exception_handler(GoogleAPICallError)
+@app.exception_handler(GoogleAuthError)
+async def _gcs_error_handler(request: Request, exc: Exception):
+    return ORJSONResponse({"detail": str(exc)}, status_code=500)
+
+
 # ---------------------------------------------------
 # UI SERVING
 # ---------------------------------------------------
 
 UI_PATH = Path(__file__).resolve().parent.parent / "ui" / "index.html"
 
+# The page is static for the life of the process: read it once at import.
+try:
+    _UI_BYTES = UI_PATH.read_bytes()
+    _UI_STATUS = 200
+except FileNotFoundError:
+    _UI_BYTES = b"<h3>UI not found. Ensure ui/index.html is packaged into container.</h3>"
+    _UI_STATUS = 500
+
 
-def serve_ui() -> HTMLResponse:
-    if not UI_PATH.exists():
-        return HTMLResponse(
-            "<h3>UI not found. Ensure ui/index.html is packaged into container.</h3>",
-            status_code=500,
-        )
-    return HTMLResponse(UI_PATH.read_text(encoding="utf-8"))
+# Content hash as ETag: browsers/CDNs revalidate with If-None-Match and get
+# a bodiless 304 until the next deploy changes the page.
+_UI_ETAG = f'"{hashlib.sha256(_UI_BYTES).hexdigest()[:32]}"'
+_UI_HEADERS = {"Cache-Control": f"public, max-age={UI_MAX_AGE}", "ETag": _UI_ETAG}
+
+
+def serve_ui(request: Request) -> Response:
+    if _UI_STATUS != 200:
+        return HTMLResponse(_UI_BYTES, status_code=_UI_STATUS)
+    # If-None-Match may list several (possibly W/-prefixed) tags
+    if _UI_ETAG in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=_UI_HEADERS)
+    return HTMLResponse(_UI_BYTES, headers=_UI_HEADERS)
 
 
 @app.get("/", include_in_schema=False)
-def root_ui():
-    return serve_ui()
+def root_ui(request: Request):
+    return serve_ui(request)
 
 
 @app.get("/ui", include_in_schema=False)
-def ui_page():
-    return serve_ui()
+def ui_page(request: Request):
+    return serve_ui(request)
 
 
 # ---------------------------------------------------
@@ -60,45 +101,100 @@ def version():
 # ---------------------------------------------------
 
 @app.post("/upload_request")
-def upload_request(request: UploadRequest):
+async def upload_request(request: UploadRequest):
     """
     1) Build object path in bucket
     2) Generate signed PUT URL
     3) Return signed_url + object_path
+
+    Signing (and any credential refresh) blocks, so it runs on a worker
+    thread and the event loop stays free.
     """
+    # Only PDFs are accepted, so the content type is known up front.
     try:
-        object_path = build_object_path(request)
+        validate_filetype(request.filename)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    content_type = "application/pdf"
 
-        content_type, _ = mimetypes.guess_type(request.filename)
-        if not content_type:
-            content_type = "application/octet-stream"
+    object_path = build_object_path(request.mfr, request.filename)
 
-        signed_url = generate_signed_put_url(
-            bucket_name=GCS_BUCKET,
-            object_name=object_path,
-            content_type=content_type,
-        )
+    signed_url = await asyncio.to_thread(
+        generate_signed_put_url,
+        bucket_name=GCS_BUCKET,
+        object_name=object_path,
+        content_type=content_type,
+    )
+    logger.info("signed upload url issued for %s", object_path)
 
-        return {"signed_url": signed_url, "object_path": object_path}
+    # Returned as a Response so FastAPI skips its jsonable_encoder pass.
+    return ORJSONResponse({"signed_url": signed_url, "object_path": object_path})
 
-    except Exception as e:
-        # Proper 500 response (not 200 with {"error":...})
-        raise HTTPException(status_code=500, detail=str(e))
 
+# ---------------------------------------------------
+# METADATA WRITES
+# ---------------------------------------------------
+# /upload_complete starts the write in the background and returns 202 right
+# away. Each upload gets its own <name>_metadata.json object, which the
+# extractor needs before it acks the PDF event, so writes start immediately;
+# METADATA_MAX_CONCURRENCY bounds how many run at once.
+#
+# A failed write is retried up to METADATA_MAX_ATTEMPTS times. If every
+# attempt fails, the client has already been given a metadata_path that will
+# never exist: the full gs:// path is logged at ERROR so it can be re-driven.
 
-@app.post("/upload_complete")
-def upload_complete(req: UploadComplete):
-    """
-    Store metadata JSON next to the uploaded PDF in the same bucket.
-    """
+METADATA_MAX_CONCURRENCY = 32
+METADATA_MAX_ATTEMPTS = 5
+
+_metadata_slots: asyncio.Semaphore = None
+_metadata_writes: set = set()
+
+
+def _write_one(object_path: str, metadata: dict, attempt: int) -> bool:
     try:
-        metadata_path = write_metadata_json(
-            bucket_name=GCS_BUCKET,
-            object_path=req.object_path,
-            metadata=req.model_dump(),  # Pydantic v2
-        )
+        write_metadata_json(bucket_name=GCS_BUCKET, object_path=object_path, metadata=metadata)
+        return True
+    except Exception:
+        logger.exception("metadata write failed for %s (attempt %d)", object_path, attempt)
+        return False
+
+
+async def _write_metadata(object_path: str, metadata: dict) -> None:
+    for attempt in range(1, METADATA_MAX_ATTEMPTS + 1):
+        async with _metadata_slots:
+            if await asyncio.to_thread(_write_one, object_path, metadata, attempt):
+                return
+        await asyncio.sleep(attempt)  # back off outside the slot
+    logger.error(
+        "giving up on metadata write: gs://%s/%s was not written",
+        GCS_BUCKET, metadata_path_for(object_path),
+    )
 
-        return {"status": "registered", "metadata_path": metadata_path}
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+async def _start_metadata_writer() -> None:
+    global _metadata_slots
+    _metadata_slots = asyncio.Semaphore(METADATA_MAX_CONCURRENCY)
+
+
+async def _stop_metadata_writer() -> None:
+    # finish everything already accepted before the process exits
+    await asyncio.gather(*_metadata_writes)
+
+
+@app.post("/upload_complete", status_code=202)
+async def upload_complete(req: UploadComplete):
+    """
+    Store the metadata JSON next to the uploaded PDF in the same bucket
+    (202: accepted, written in the background; see METADATA WRITES).
+    """
+    metadata = req.model_dump()  # Pydantic v2; plain dict, dumped once
+    task = asyncio.create_task(_write_metadata(req.object_path, metadata))
+    # keep a reference until done (the loop only holds weak ones)
+    _metadata_writes.add(task)
+    task.add_done_callback(_metadata_writes.discard)
+    logger.info("metadata write started for %s", req.object_path)
+
+    return ORJSONResponse(
+        {"status": "accepted", "metadata_path": metadata_path_for(req.object_path)},
+        status_code=202,
+    )
\ No newline at end of file
@@ -1,21 +1,25 @@
-import os, re
-from datetime import datetime, timezone
+import re, time
 
-ALLOWED_EXTENSIONS = [".pdf"]
+ALLOWED_EXTENSIONS = frozenset({".pdf"})
+_ALLOWED_SUFFIXES = tuple(ALLOWED_EXTENSIONS)  # str.endswith takes a tuple
+
+_SLUG_RE = re.compile(r"[^a-z0-9-]")
 
 def make_mfr_slug(mfr: str) -> str:
-    slug = mfr.lower().strip().replace(" ", "-")
-    return re.sub(r"[^a-z0-9-]", "", slug)
+    return _SLUG_RE.sub("", mfr.lower().strip().replace(" ", "-"))
 
 def utc_timestamp():
-    return datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%SZ")
+    return time.strftime("%Y%m%d_%H%M%SZ", time.gmtime())
 
 def safe_filename(filename: str) -> str:
-    return os.path.basename(filename).replace(" ", "_").lower()
+    # names come from JSON and object paths, so "/" is the only separator
+    return filename.rsplit("/", 1)[-1].replace(" ", "_").lower()
 
 def validate_filetype(filename: str):
-    ext = os.path.splitext(filename)[1].lower()
-    if ext not in ALLOWED_EXTENSIONS:
+    # ".pdf", "..pdf" etc. are hidden files with no extension (os.path.splitext
+    # ignores leading dots), so the stem must have something besides dots
+    name = filename.rsplit("/", 1)[-1].lower()
+    if not name.endswith(_ALLOWED_SUFFIXES) or not name.rsplit(".", 1)[0].strip("."):
         raise ValueError("Only PDF files are allowed")
 
 def build_object_path(mfr: str, filename: str) -> str:
@@ -0,0 +1,14 @@
+import pytest
+
+from app.utils import validate_filetype
+
+
+@pytest.mark.parametrize("name", ["a.pdf", "A.PDF", "a..pdf", ".a.pdf", "dir/a.pdf"])
+def test_validate_filetype_accepts_pdf(name):
+    validate_filetype(name)
+
+
+@pytest.mark.parametrize("name", [".pdf", "..pdf", "...pdf", "dir/..pdf", "a.txt", "pdf"])
+def test_validate_filetype_rejects(name):
+    with pytest.raises(ValueError):
+        validate_filetype(name)